@@ -0,0 +1,116 @@
+import re
+
+# Inputs
+data_fields = [
+    ('Blocks', r'Number of blocks\s*:\s*(?P<blocks>\d+)'),
+    ('Trips', r'Number of in-service trips\s*:\s*(?P<trips>\d+)'),
+    ('Off Service Duration', r'Off-service duration\s*:\s*(?P<off>[\dhm]+)'),
+    ('In Service Duration', r'In-service duration\s*:\s*(?P<ins>[\dhm]+)'),
+    ('Loading Duration', r'Loading duration\s*:\s*(?P<load>[\dhm]+)'),
+    ('Layover Duration', r'Layover duration\s*:\s*(?P<lay>[\dhm]+)'),
+    ('Platform Hours', r'Total duration\s*:\s*(?P<plat>[\dhm]+)'),
+    ('In-service Distance (KM)', r'In-service distance\s*:\s*(?P<dist>[\d\.]+)'),
+    ('Revenue Hours', None),  # Computed
+]
+
+# All field patterns fused into one alternation; the named value group
+# that matched (m.lastgroup) identifies the field. Some report layouts put
+# two fields on one line (e.g. "Number of blocks : 3    Number of in-service
+# trips : 10"), so lines are scanned with finditer to pick up every field
+field_re = re.compile('|'.join(regex for _, regex in data_fields if regex is not None))
+field_names = {slug: name for name, regex in data_fields if regex is not None
+               for slug in re.compile(regex).groupindex}
+
+booking_re = re.compile(r'Booking:\s*(\d+)')
+
+# Matching
+def parse_time_string(time_str):
+    # Durations look like "12h34", optionally with a trailing "m"
+    hours, sep, minutes = time_str.partition('h')
+    if not sep:
+        return 0.0
+    try:
+        return round(int(hours) + int(minutes.rstrip('m')) / 60, 2)
+    except ValueError:
+        return 0.0
+
+def parse_number(num_str):
+    try:
+        return float(num_str)
+    except ValueError:
+        return 0.0
+
+field_converters = {
+    'Blocks': int,
+    'Trips': int,
+    'Off Service Duration': parse_time_string,
+    'In Service Duration': parse_time_string,
+    'Loading Duration': parse_time_string,
+    'Layover Duration': parse_time_string,
+    'Platform Hours': parse_time_string,
+    'In-service Distance (KM)': parse_number,
+}
+slot_converters = {slug: field_converters[name] for slug, name in field_names.items()}
+
+class RouteRecord:
+    # One slot per parsed field, in data_fields order and named after the
+    # value groups in field_re, plus the share of the figures to report.
+    # The field slots hold the parsed figures before the share is applied,
+    # so read report values through values() and rev, not the slots.
+    __slots__ = tuple(field_names) + ('share',)
+
+    def __init__(self):
+        for slug in field_names:
+            setattr(self, slug, 0)
+        self.share = 1
+
+    @property
+    def rev(self):
+        # Summed from the full durations before the share is applied
+        return round(round(self.ins + self.lay, 2) * self.share, 2)
+
+    def values(self):
+        # Row values matching data_fields, with the computed Revenue Hours last
+        vals = [getattr(self, slug) for slug in field_names]
+        if self.share != 1:
+            vals = [round(val * self.share, 2) for val in vals]
+        return vals + [self.rev]
+
+def extract_data(file_path):
+    booking_code = None
+    data = {}
+    current_record = None
+
+    # Local aliases for names used on every line of the loop below
+    search_booking = booking_re.search
+    find_fields = field_re.finditer
+    converters = slot_converters
+    new_record = RouteRecord
+    set_field = setattr
+
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if booking_code is None and 'Booking:' in line:
+                booking_match = search_booking(line)
+                if booking_match:
+                    booking_code = booking_match.group(1)
+
+            # Cheap string checks first; most lines are neither a route header nor a field
+            if line.lstrip().startswith('Route'):
+                parts = line.split(None, 2)
+                if parts[0] == 'Route' and len(parts) > 1:
+                    route_num = parts[1]
+                    route_name = parts[2].strip() if len(parts) > 2 else ''
+                    current_record = data[f"{route_num} {route_name}"] = new_record()
+                    continue
+
+            if current_record is not None and ':' in line:
+                for m in find_fields(line):
+                    slug = m.lastgroup
+                    set_field(current_record, slug, converters[slug](m.group(slug).strip()))
+
+    senior_route = next((r for r in data if r.strip().lower() == "65 senior shopper"), None)
+    if senior_route:
+        data[senior_route].share = 0.5
+
+    return booking_code or "unknown", data